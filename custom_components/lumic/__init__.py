@@ -1,16 +1,95 @@
+import asyncio
 import logging
 
-PLATFORMS = ["light", "switch"]
+from .const import DOMAIN
+
+PLATFORMS = ["light", "switch", "cover"]
 
 _LOGGER = logging.getLogger(__name__)
 
 async def async_setup(hass, config):
     """Setup Lumic."""
     _LOGGER.info("Setting up.")
+    from .services import async_setup_services
+
+    async_setup_services(hass)
     return True
 
 async def async_setup_entry(hass, config_entry):
     """Set up entry."""
     _LOGGER.info("Initializing config entry.")
+    from .api import LumicAPI, OAuth2Client, get_home_ids
+    from .catalogue import LumicCatalogue
+    from .config_flow import get_write_behind
+    from .coordinator import LumicHomeCoordinator
+
+    auth = OAuth2Client(hass, config_entry.data)
+    api = LumicAPI(auth, hass, config_entry.data)
+    catalogue = LumicCatalogue(hass, config_entry.entry_id)
+    await catalogue.async_load()
+    coordinators = [
+        LumicHomeCoordinator(hass, api, home_id, catalogue)
+        for home_id in get_home_ids(config_entry.data)
+    ]
+
+    # Homes known from the catalogue come up immediately and are reconciled
+    # with the cloud in the background. The others are discovered in
+    # parallel; they share one token and one session.
+    pending = []
+    background = []
+    for coordinator in coordinators:
+        if coordinator.async_restore():
+            background.append(hass.async_create_task(coordinator.async_refresh()))
+        else:
+            pending.append(coordinator.async_config_entry_first_refresh())
+    try:
+        await asyncio.gather(*pending)
+    except Exception:
+        # Setup is retried with a new API instance, close the session this
+        # one may have opened.
+        for task in background:
+            task.cancel()
+        await api.close()
+        raise
+
+    queue = None
+    if get_write_behind(config_entry):
+        from .command_queue import LumicCommandQueue
+
+        queue = LumicCommandQueue(hass, api, config_entry.entry_id)
+        await queue.async_load()
+        queue.async_start()
+
+    hass.data.setdefault(DOMAIN, {})[config_entry.entry_id] = {
+        "api": api,
+        "coordinators": coordinators,
+        "catalogue": catalogue,
+        "entities": {},
+        "queue": queue,
+    }
+    config_entry.async_on_unload(config_entry.add_update_listener(async_reload_entry))
     hass.config_entries.async_setup_platforms(config_entry, PLATFORMS)
     return True
+
+async def async_reload_entry(hass, config_entry):
+    """Reload entry after its options changed."""
+    await hass.config_entries.async_reload(config_entry.entry_id)
+
+async def async_unload_entry(hass, config_entry):
+    """Unload entry."""
+    unload_ok = await hass.config_entries.async_unload_platforms(config_entry, PLATFORMS)
+    if unload_ok:
+        data = hass.data[DOMAIN].pop(config_entry.entry_id)
+        if data["queue"] is not None:
+            await data["queue"].async_stop()
+        await data["catalogue"].async_save()
+        await data["api"].close()
+    return unload_ok
+
+async def async_remove_entry(hass, config_entry):
+    """Delete the stored catalogue and commands of a removed entry."""
+    from .catalogue import LumicCatalogue
+    from .command_queue import LumicCommandQueue
+
+    await LumicCatalogue(hass, config_entry.entry_id).async_remove()
+    await LumicCommandQueue(hass, None, config_entry.entry_id).async_remove()
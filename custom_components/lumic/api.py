@@ -1,37 +1,126 @@
 import asyncio
 import logging, os
-from requests.adapters import HTTPAdapter
-from requests_oauthlib import OAuth2Session
-from oauthlib.oauth2.rfc6749.errors import InvalidGrantError
-from oauthlib.oauth2 import BackendApplicationClient
-from requests.auth import HTTPBasicAuth
-from urllib3.util import Retry
 from homeassistant.const import CONF_CLIENT_ID, CONF_CLIENT_SECRET
 import json
-from gql import gql, Client
-from gql.transport.aiohttp import AIOHTTPTransport
 import time
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from .const import (
     CONF_HOME_ID,
+    CONF_HOME_IDS,
     API_ENDPOINT,
     OAUTH2_CALLBACK_PATH,
     OAUTH2_SCOPE,
     OAUTH2_FILE,
     OAUTH2_TOKEN_URL,
     QUERY_HOME_DEVICES,
+    QUERY_DEVICES_CHUNK_SIZE,
+    QUERY_DEVICES_PARAMETERS,
+    QUERY_DEVICES_PARAMETERS_FIELD,
+    QUERY_DEVICES_PARAMETERS_VARIABLES,
     QUERY_DEVICE_BY_ID,
+    MUTATION_BATCH_SIZE,
     MUTATION_DEVICE_PARAMETER_SET,
+    MUTATION_DEVICE_PARAMETERS_SET,
+    MUTATION_DEVICE_PARAMETERS_SET_FIELD,
+    MUTATION_DEVICE_PARAMETERS_SET_VARIABLES,
 )
 
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds before the expiry of an access token at which it is renewed.
+TOKEN_EXPIRY_MARGIN = 60
+
+
+def json_loads(data):
+    """Decode JSON, with orjson if it is available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(data):
+    """Encode JSON to a string, with orjson if it is available."""
+    if orjson is not None:
+        return orjson.dumps(data).decode()
+    return json.dumps(data)
+
+
+def _load_gql():
+    """Import gql, which is slow to import and only needed once we talk to the API."""
+    from gql import gql, Client
+    from gql.transport.aiohttp import AIOHTTPTransport
+
+    return gql, Client, AIOHTTPTransport
+
+
+def _load_oauth():
+    """Import the OAuth2 stack, which is only needed when a token is fetched."""
+    from requests_oauthlib import OAuth2Session
+    from oauthlib.oauth2 import BackendApplicationClient
+    from requests.auth import HTTPBasicAuth
+
+    return OAuth2Session, BackendApplicationClient, HTTPBasicAuth
+
+
+def get_home_ids(config):
+    """Return the list of home IDs configured in a config entry.
+
+    Entries created before multiple homes were supported only carry a single
+    ``home_id``. Duplicates are dropped, a home must only be set up once.
+    """
+    home_ids = config.get(CONF_HOME_IDS)
+    if home_ids is None:
+        home_ids = [config.get(CONF_HOME_ID)]
+    return list(dict.fromkeys(int(i) for i in home_ids if i is not None))
+
 
 class LumicAPI:
     def __init__(self, auth, hass, config):
         self._auth = auth
         self._hass = hass
         self._config = config
+        self._gql = None
+        self._documents = {}
+        self._client = None
+        self._session = None
+        self._session_lock = asyncio.Lock()
         self._logger = logging.getLogger(__name__ + ":" + self.__class__.__name__)
 
+    async def _getSession(self):
+        """Return the GraphQL session, opening it on first use.
+
+        The session (and its underlying HTTP connection pool) is shared by
+        every request of this API instance, so all homes of a config entry
+        go over the same connections.
+        """
+        async with self._session_lock:
+            if self._session is None:
+                # Import off the event loop, gql pulls in graphql-core.
+                self._gql, Client, AIOHTTPTransport = await self._hass.async_add_executor_job(
+                    _load_gql
+                )
+                self._client = Client(
+                    transport=AIOHTTPTransport(
+                        url=API_ENDPOINT,
+                        client_session_args={"json_serialize": json_dumps},
+                    )
+                )
+                self._session = await self._client.__aenter__()
+            return self._session
+
+    async def close(self):
+        """Close the shared GraphQL session."""
+        async with self._session_lock:
+            if self._client is not None:
+                await self._client.__aexit__(None, None, None)
+            self._client = None
+            self._session = None
+
     async def _request(self, query, vars):
         if self._auth is None:
             _LOGGER.error(
@@ -46,14 +135,18 @@ class LumicAPI:
             access_token = (await self._auth.getToken())["access_token"]
             self._logger.debug("Access Token: %s", access_token)
 
-            transport = AIOHTTPTransport(
-                url=API_ENDPOINT,
-                headers={"Authorization": "Bearer %s" % access_token},
-            )
-            session = Client(transport=transport)
+            session = await self._getSession()
 
-            gql_query = gql(query)
-            result = await self._hass.async_add_executor_job(session.execute, gql_query, vars)
+            gql_query = self._documents.get(query)
+            if gql_query is None:
+                gql_query = self._documents[query] = self._gql(query)
+            result = await session.execute(
+                gql_query,
+                variable_values=vars,
+                extra_args={
+                    "headers": {"Authorization": "Bearer %s" % access_token}
+                },
+            )
 
             return result
         except Exception as e:
@@ -61,26 +154,90 @@ class LumicAPI:
             self._logger.error(e)
             return {}
 
+    async def _requestJson(self, query, vars):
+        """Execute a query, bypassing gql's response handling.
+
+        The body is read as bytes and decoded with ``json_loads``, which avoids
+        gql's intermediate text copy and uses orjson when it is installed. Used
+        for the large home payloads and for the frequent device polls.
+        """
+        if self._auth is None:
+            _LOGGER.error(
+                "Cannot originate requets to Lumic API, not authenticated (no token)."
+            )
+            return None
+
+        self._logger.debug("Query: %s", query)
+        self._logger.debug("Vars: %s", vars)
+
+        try:
+            access_token = (await self._auth.getToken())["access_token"]
+            await self._getSession()
+
+            async with self._client.transport.session.post(
+                API_ENDPOINT,
+                data=json_dumps({"query": query, "variables": vars}),
+                headers={
+                    "Authorization": "Bearer %s" % access_token,
+                    "Content-Type": "application/json",
+                },
+            ) as resp:
+                resp.raise_for_status()
+                result = json_loads(await resp.read())
+
+            if result.get("errors"):
+                raise Exception(result["errors"][0])
+            return result.get("data") or {}
+        except Exception as e:
+            self._logger.error("Error while executing GraphQL query:")
+            self._logger.error(e)
+            return {}
+
     async def sleep(self, _time):
         def _sleep():
             time.sleep(_time)
         await self._hass.async_add_executor_job(_sleep)
 
-    async def getHomeDevices(self, _type):
-        result = await self._request(QUERY_HOME_DEVICES, {
-            "id": self._config.get(CONF_HOME_ID)
+    async def getHomeDevices(self, _type=None, home_id=None):
+        if home_id is None:
+            home_id = self._config.get(CONF_HOME_ID)
+
+        result = await self._requestJson(QUERY_HOME_DEVICES, {
+            "id": home_id
         })
 
         devices = []
         for i in result["homeById"]["devices"]:
-            if i["deviceType"] == _type:
+            if _type is None or i["deviceType"] == _type:
                 devices.append(i)
 
         return devices
     
-    async def getDeviceById(self, id):
+    async def iterDeviceParameters(self, ids):
+        """Yield the given devices with their parameters.
+
+        The devices are read ``QUERY_DEVICES_CHUNK_SIZE`` at a time, so each
+        chunk can be processed as soon as it arrives and no response grows with
+        the size of the home.
+        """
+        ids = list(ids)
+        for start in range(0, len(ids), QUERY_DEVICES_CHUNK_SIZE):
+            chunk = ids[start:start + QUERY_DEVICES_CHUNK_SIZE]
+            query = QUERY_DEVICES_PARAMETERS % (
+                ", ".join(QUERY_DEVICES_PARAMETERS_VARIABLES % {"i": i} for i in range(len(chunk))),
+                "\n".join(QUERY_DEVICES_PARAMETERS_FIELD % {"i": i} for i in range(len(chunk))),
+            )
+            result = await self._requestJson(
+                query, {"id%i" % i: float(_id) for i, _id in enumerate(chunk)}
+            )
+            for i in range(len(chunk)):
+                device = (result or {}).get("device%i" % i)
+                if device is not None:
+                    yield device
+
+    async def getDeviceById(self, id, query=QUERY_DEVICE_BY_ID):
         try:
-            result = await self._request(QUERY_DEVICE_BY_ID, {
+            result = await self._requestJson(query, {
                 "id": id
             })
 
@@ -92,17 +249,44 @@ class LumicAPI:
 
     async def setDeviceParameter(self, uuid, _type, value):
         try:
-            await self._request(MUTATION_DEVICE_PARAMETER_SET, {
+            result = await self._request(MUTATION_DEVICE_PARAMETER_SET, {
                 "uuid": uuid,
                 "type": _type,
                 "value": value,
             })
-            return True
+            return bool(result)
         except Exception as e:
             self._logger.error("Error while executing GraphQL mutation:")
             self._logger.error(e)
             return False
 
+    async def setDeviceParameters(self, parameters):
+        """Set several device parameters with as few requests as possible.
+
+        ``parameters`` is a list of ``(uuid, type, value)`` tuples. They are
+        sent as aliased mutations, ``MUTATION_BATCH_SIZE`` per request.
+        """
+        success = True
+        for start in range(0, len(parameters), MUTATION_BATCH_SIZE):
+            batch = parameters[start:start + MUTATION_BATCH_SIZE]
+            variables = {}
+            for i, (uuid, _type, value) in enumerate(batch):
+                variables["uuid%i" % i] = uuid
+                variables["type%i" % i] = _type
+                variables["value%i" % i] = value
+            query = MUTATION_DEVICE_PARAMETERS_SET % (
+                ", ".join(MUTATION_DEVICE_PARAMETERS_SET_VARIABLES % {"i": i} for i in range(len(batch))),
+                "\n".join(MUTATION_DEVICE_PARAMETERS_SET_FIELD % {"i": i} for i in range(len(batch))),
+            )
+            try:
+                if not await self._request(query, variables):
+                    success = False
+            except Exception as e:
+                self._logger.error("Error while executing GraphQL mutation:")
+                self._logger.error(e)
+                success = False
+        return success
+
 
 class OAuth2Client:
     """Define an OAuth2 client."""
@@ -115,32 +299,42 @@ class OAuth2Client:
         self._config = config
         self._logger = logging.getLogger(__name__ + ":" + self.__class__.__name__)
 
+    def _isExpired(self, token):
+        expires_at = token.get("expires_at")
+        if expires_at is None:
+            return True
+        return expires_at - TOKEN_EXPIRY_MARGIN <= time.time()
+
     async def getToken(self):
         try:
             self._logger.debug("Acquiring lock for OAuth2 client...")
             await self._mutex.acquire()
             self._logger.debug("Acquired lock.")
+            if self._token is not None and not self._isExpired(self._token):
+                return self._token
+
             config_path = self._hass.config.path(OAUTH2_FILE)
             if os.path.isfile(config_path):
                 with open(config_path, "r") as json_file:
                     try:
-                        self._token = json.loads(json_file.read())
+                        self._token = json_loads(json_file.read())
                     except Exception as e:
                         self._logger.error("Error while reading token file:")
                         self._logger.error(e)
                     finally:
                         json_file.close()
 
-            def fetch_token(oauth):
-                print(self._config.get(CONF_CLIENT_ID))
-                print(self._config.get(CONF_CLIENT_SECRET))
-                auth = HTTPBasicAuth(self._config.get(CONF_CLIENT_ID), self._config.get(CONF_CLIENT_SECRET))
-                return oauth.fetch_token(
-                    token_url=OAUTH2_TOKEN_URL,
-                    auth=auth,
-                )
+                if self._token is not None and not self._isExpired(self._token):
+                    return self._token
 
-            def refresh_token(oauth):
+            def fetch_token(token=None):
+                OAuth2Session, BackendApplicationClient, HTTPBasicAuth = _load_oauth()
+                oauth = OAuth2Session(
+                    client=BackendApplicationClient(
+                        client_id=self._config.get(CONF_CLIENT_ID)
+                    ),
+                    token=token,
+                )
                 auth = HTTPBasicAuth(self._config.get(CONF_CLIENT_ID), self._config.get(CONF_CLIENT_SECRET))
                 return oauth.fetch_token(
                     token_url=OAUTH2_TOKEN_URL,
@@ -148,41 +342,21 @@ class OAuth2Client:
                 )
 
             if self._token is None:
-                oauth = OAuth2Session(
-                    client=BackendApplicationClient(
-                        client_id=self._config.get(CONF_CLIENT_ID)
-                    )
-                )
-                self._token = await self._hass.async_add_executor_job(
-                    fetch_token, oauth
-                )
+                self._token = await self._hass.async_add_executor_job(fetch_token)
             else:
                 try:
-                    oauth = OAuth2Session(
-                        client=BackendApplicationClient(
-                            client_id=self._config.get(CONF_CLIENT_ID)
-                        ),
-                        token=self._token,
-                    )
                     self._token = await self._hass.async_add_executor_job(
-                        refresh_token, oauth
+                        fetch_token, self._token
                     )
                 except Exception as e:
                     self._logger.error(
                         "Error while obtaining token via RefreshToken flow, reauthenticating:"
                     )
                     self._logger.error(e)
-                    oauth = OAuth2Session(
-                        client=BackendApplicationClient(
-                            client_id=self._config.get(CONF_CLIENT_ID)
-                        )
-                    )
-                    self._token = await self._hass.async_add_executor_job(
-                        fetch_token, oauth
-                    )
+                    self._token = await self._hass.async_add_executor_job(fetch_token)
 
             with open(self._hass.config.path(OAUTH2_FILE), "w") as json_file:
-                json_file.write(json.dumps(self._token))
+                json_file.write(json_dumps(self._token))
                 json_file.close()
 
             self._logger.debug("Tokenset: %s", self._token)
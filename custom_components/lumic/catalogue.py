@@ -0,0 +1,79 @@
+"""Persisted device catalogue for the Lumic integration."""
+from __future__ import annotations
+
+import logging
+
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+# Seconds between persisting the catalogue while it changes.
+SAVE_DELAY = 10
+
+
+class LumicCatalogue:
+    """Remember the devices of each home and the last state of each device.
+
+    On startup entities are restored from the catalogue, so they come up
+    without waiting for the cloud and are reconciled in the background.
+    """
+
+    def __init__(self, hass, entry_id):
+        self._store = Store(hass, STORAGE_VERSION, "%s.%s.catalogue" % (DOMAIN, entry_id))
+        self._homes: dict[str, list] = {}
+        self._devices: dict[str, dict] = {}
+
+    async def async_load(self):
+        """Load the catalogue from disk."""
+        data = await self._store.async_load()
+        if not data:
+            return
+        self._homes = data.get("homes", {})
+        self._devices = data.get("devices", {})
+
+    def home_devices(self, home_id):
+        """Return the stored device list of a home, or None if unknown."""
+        return self._homes.get(str(home_id))
+
+    def set_home_devices(self, home_id, devices):
+        """Store the device list of a home."""
+        if self._homes.get(str(home_id)) == devices:
+            return
+        self._homes[str(home_id)] = devices
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def device(self, device_id):
+        """Return the last known state of a device, or None if unknown."""
+        return self._devices.get(str(device_id))
+
+    def set_device(self, device_id, device):
+        """Store the last known state of a device.
+
+        Polls mostly return what is already stored; only changes are written,
+        so the catalogue file is not rewritten on every poll.
+        """
+        if self._devices.get(str(device_id)) == device:
+            return
+        self._devices[str(device_id)] = device
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def remove_device(self, device_id):
+        """Forget a device that left its home."""
+        if self._devices.pop(str(device_id), None) is not None:
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def async_save(self):
+        """Write the catalogue to disk now."""
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self):
+        """Delete the catalogue from disk, once its config entry was removed."""
+        await self._store.async_remove()
+
+    def _data_to_save(self):
+        return {"homes": self._homes, "devices": self._devices}
@@ -0,0 +1,64 @@
+"""Conversion between Home Assistant colors and Lumic color parameters.
+
+Lumic lights take their color as a fully saturated ``COLOR`` hex value plus a
+``COLOR_WHITE`` level (0..255), while Home Assistant uses hue (0..360) and
+saturation (0..100). Conversions are cached in both directions; inputs are
+quantized first so that nearby values share cache entries.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+import colorsys
+
+# Number of cached conversions per direction.
+CACHE_SIZE = 1024
+
+# Hue is quantized to this many steps per degree before conversion. Compared
+# with converting the exact hue, a channel of the resulting color can be off
+# by one step (of 255); whole-degree hues convert exactly.
+HUE_STEPS = 10
+
+
+def _quantize(hue, saturation):
+    return int(round(hue * HUE_STEPS)) % (360 * HUE_STEPS), int(saturation)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _hs_to_lumic(hue_step, saturation):
+    r, g, b = colorsys.hsv_to_rgb(hue_step / (360 * HUE_STEPS), 1.0, 255)
+    color_white = int(255 - saturation * 255 / 100)
+    if color_white == 255:
+        return "#000000", color_white
+    return "#%02x%02x%02x" % (int(r), int(g), int(b)), color_white
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _lumic_to_hs(color, color_white):
+    r, g, b = int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+    h, s, v = colorsys.rgb_to_hsv(r, g, b)
+    return int(h * 360), int((255 - color_white) * 100 / 255)
+
+
+def hs_to_lumic(hue, saturation):
+    """Return the ``COLOR`` and ``COLOR_WHITE`` values for a hue and saturation."""
+    return _hs_to_lumic(*_quantize(hue, saturation))
+
+
+def lumic_to_hs(color, color_white):
+    """Return hue and saturation for ``COLOR`` and ``COLOR_WHITE`` values."""
+    return _lumic_to_hs(color.lower(), int(color_white))
+
+
+def hs_to_lumic_many(colors):
+    """Convert many ``(hue, saturation)`` pairs, e.g. lights or transition frames."""
+    return [_hs_to_lumic(*_quantize(hue, saturation)) for hue, saturation in colors]
+
+
+def lumic_to_hs_many(values):
+    """Convert many ``(COLOR, COLOR_WHITE)`` pairs."""
+    return [_lumic_to_hs(color.lower(), int(color_white)) for color, color_white in values]
+
+
+def cache_info():
+    """Return the cache statistics of both directions."""
+    return {"hs_to_lumic": _hs_to_lumic.cache_info(), "lumic_to_hs": _lumic_to_hs.cache_info()}
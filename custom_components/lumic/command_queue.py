@@ -0,0 +1,214 @@
+"""Write-behind command queue for the Lumic integration."""
+from __future__ import annotations
+
+from collections import OrderedDict
+import asyncio
+import logging
+import time
+
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+# Seconds to wait before retrying a command, doubled on each failure.
+RETRY_INITIAL_DELAY = 1
+RETRY_MAX_DELAY = 60
+
+# Seconds after which a command that could not be delivered is given up.
+COMMAND_TIMEOUT = 600
+
+# Seconds between persisting the queue while it changes.
+SAVE_DELAY = 1
+
+
+class LumicCommandQueue:
+    """Queue device parameter writes and deliver them in the background.
+
+    Commands are kept per device and coalesced by parameter type, so only the
+    latest value of a parameter is sent. Each device's commands are delivered
+    in the order they were last written. Failed commands are retried with an
+    exponential backoff per device, so a device that keeps failing does not
+    hold back the others, until ``COMMAND_TIMEOUT``; after that the optional
+    ``on_failure`` callback of the command is invoked so the entity can roll
+    back its optimistic state. The queue is persisted, so pending commands are
+    replayed after a restart.
+    """
+
+    def __init__(self, hass, api, entry_id):
+        self._hass = hass
+        self._api = api
+        self._store = Store(hass, STORAGE_VERSION, "%s.%s.commands" % (DOMAIN, entry_id))
+        # uuid -> OrderedDict(type -> command)
+        self._pending: dict[str, OrderedDict] = {}
+        # uuid -> (monotonic time of the next attempt, current retry delay)
+        self._retry: dict[str, tuple[float, float]] = {}
+        self._wakeup = asyncio.Event()
+        self._worker = None
+        self._logger = logging.getLogger(__name__ + ":" + self.__class__.__name__)
+
+    async def async_load(self):
+        """Restore commands that were not delivered before the last shutdown."""
+        data = await self._store.async_load()
+        if not data:
+            return
+        for uuid, commands in data.get("pending", {}).items():
+            device = self._pending.setdefault(uuid, OrderedDict())
+            for command in commands:
+                device[command["type"]] = {
+                    "value": command["value"],
+                    "delay": command.get("delay", 0),
+                    "created": command.get("created", time.time()),
+                    "on_failure": None,
+                }
+        if self._pending:
+            self._logger.info("Replaying %i pending Lumic commands.", self.size())
+            self._wakeup.set()
+
+    def async_start(self):
+        """Start the background worker."""
+        if self._worker is None:
+            self._worker = self._hass.async_create_task(self._async_run())
+
+    async def async_stop(self):
+        """Stop the background worker and persist the pending commands."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self):
+        """Delete the persisted commands, once the config entry was removed."""
+        await self._store.async_remove()
+
+    def enqueue(self, uuid, _type, value, on_failure=None, delay=0):
+        """Queue a parameter write, replacing a pending write of the same type.
+
+        A replaced write hands its ``on_failure`` and creation time on to the
+        new one: its rollback restores the last state the cloud confirmed,
+        whereas the new one would only restore the unconfirmed optimistic
+        state.
+        """
+        device = self._pending.setdefault(uuid, OrderedDict())
+        previous = device.pop(_type, None)
+        if previous is not None:
+            on_failure = previous["on_failure"]
+        device[_type] = {
+            "value": value,
+            "delay": delay,
+            "created": time.time() if previous is None else previous["created"],
+            "on_failure": on_failure,
+        }
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        self._wakeup.set()
+
+    def has_pending(self, uuid):
+        """Return true if writes for the device are waiting to be delivered."""
+        return bool(self._pending.get(uuid))
+
+    def pending_values(self, uuid):
+        """Return ``{type: value}`` of the writes waiting for the device.
+
+        A write stays pending while it is in flight, so these are the values
+        the device will end up with.
+        """
+        return {_type: command["value"] for _type, command in self._pending.get(uuid, {}).items()}
+
+    def size(self):
+        """Return the number of pending writes."""
+        return sum(len(i) for i in self._pending.values())
+
+    def _data_to_save(self):
+        return {
+            "pending": {
+                uuid: [
+                    {
+                        "type": _type,
+                        "value": command["value"],
+                        "delay": command["delay"],
+                        "created": command["created"],
+                    }
+                    for _type, command in device.items()
+                ]
+                for uuid, device in self._pending.items()
+                if device
+            }
+        }
+
+    async def _async_run(self):
+        while True:
+            # Cleared before the round, so commands queued meanwhile start
+            # the next round right away.
+            self._wakeup.clear()
+            for uuid in list(self._pending):
+                retry = self._retry.get(uuid)
+                if retry is not None and retry[0] > time.monotonic():
+                    continue
+                try:
+                    success = await self._async_flush_device(uuid)
+                except Exception as e:
+                    self._logger.error("Error while delivering commands to Lumic device %s:", uuid)
+                    self._logger.error(e)
+                    success = False
+
+                if success:
+                    self._retry.pop(uuid, None)
+                else:
+                    delay = RETRY_INITIAL_DELAY if retry is None else min(retry[1] * 2, RETRY_MAX_DELAY)
+                    self._retry[uuid] = (time.monotonic() + delay, delay)
+
+            # Sleep until the next retry is due or a command is queued.
+            timeout = None
+            if self._retry:
+                timeout = max(0, min(i[0] for i in self._retry.values()) - time.monotonic())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _async_flush_device(self, uuid):
+        """Deliver the commands of a device in order, stop at the first failure."""
+        device = self._pending.get(uuid)
+        while device:
+            _type, command = next(iter(device.items()))
+            if command["delay"]:
+                await asyncio.sleep(command["delay"])
+
+            success = await self._api.setDeviceParameter(uuid, _type, command["value"])
+
+            # The command may have been replaced while it was in flight; only
+            # drop it if it is still the same one.
+            if device.get(_type) is command:
+                if success:
+                    del device[_type]
+                elif time.time() - command["created"] > COMMAND_TIMEOUT:
+                    self._logger.error(
+                        "Giving up %s=%s for Lumic device %s.", _type, command["value"], uuid
+                    )
+                    del device[_type]
+                    if command["on_failure"] is not None:
+                        try:
+                            command["on_failure"]()
+                        except Exception as e:
+                            self._logger.error("Error while rolling back Lumic device %s:", uuid)
+                            self._logger.error(e)
+                else:
+                    self._logger.warning(
+                        "Delivering %s=%s to Lumic device %s failed, retrying.",
+                        _type,
+                        command["value"],
+                        uuid,
+                    )
+                    return False
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+        self._pending.pop(uuid, None)
+        return True
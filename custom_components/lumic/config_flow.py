@@ -1,10 +1,30 @@
 from homeassistant import config_entries
-from .const import DOMAIN
+from homeassistant.core import callback
+from .const import CONF_HOME_ID, CONF_HOME_IDS, CONF_WRITE_BEHIND, DOMAIN
 import voluptuous as vol
 import logging
 
 _LOGGER = logging.getLogger(__name__)
 
+
+def parse_home_ids(value):
+    """Parse a comma separated list of home IDs, dropping duplicates."""
+    return list(
+        dict.fromkeys(int(i) for i in str(value).replace(";", ",").split(",") if i.strip())
+    )
+
+
+def get_write_behind(config_entry):
+    """Return whether write-behind is enabled for a config entry.
+
+    Entries created before the options flow existed keep the setting in their
+    data until the options are saved for the first time.
+    """
+    return config_entry.options.get(
+        CONF_WRITE_BEHIND, config_entry.data.get(CONF_WRITE_BEHIND, False)
+    )
+
+
 class LumicConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Example config flow."""
 
@@ -12,18 +32,54 @@ class LumicConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     async def async_step_user(self, info):
         """Config flow step user."""
+        errors = {}
         if info is not None:
             if not info.get("client_id") is None and not info.get("client_secret") is None and not info.get("home_id") is None:
-                self.data = info
-                return await self.async_step_finish()
+                try:
+                    home_ids = parse_home_ids(info[CONF_HOME_ID])
+                except ValueError:
+                    home_ids = []
+                if home_ids:
+                    self.data = dict(info)
+                    self.data[CONF_HOME_ID] = home_ids[0]
+                    self.data[CONF_HOME_IDS] = home_ids
+                    return await self.async_step_finish()
+                errors[CONF_HOME_ID] = "invalid_home_id"
 
         return self.async_show_form(
             step_id="user", data_schema=vol.Schema({
-                vol.Required("home_id"): int,
+                vol.Required("home_id"): str,
                 vol.Required("client_id"): str,
                 vol.Required("client_secret"): str,
-            })
+                vol.Optional(CONF_WRITE_BEHIND, default=False): bool,
+            }),
+            errors=errors,
         )
     
     async def async_step_finish(self, user_input=None):
         return self.async_create_entry(title="Lumic Lighting", data=self.data)
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        return LumicOptionsFlow(config_entry)
+
+
+class LumicOptionsFlow(config_entries.OptionsFlow):
+    """Options flow for changing the settings of an existing entry."""
+
+    def __init__(self, config_entry):
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Options flow step init."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        return self.async_show_form(
+            step_id="init", data_schema=vol.Schema({
+                vol.Optional(
+                    CONF_WRITE_BEHIND, default=get_write_behind(self.config_entry)
+                ): bool,
+            })
+        )
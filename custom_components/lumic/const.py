@@ -12,6 +12,8 @@ OAUTH2_SCOPE = ["lumic", "offline_access"]
 OAUTH2_FILE = ".lumic_oauth2.json"
 
 CONF_HOME_ID = "home_id"
+CONF_HOME_IDS = "home_ids"
+CONF_WRITE_BEHIND = "write_behind"
 
 ATTR_DEVICE_TYPE_LIGHT = "LIGHT"
 ATTR_DEVICE_TYPE_SWITCH = "SWITCH"
@@ -35,6 +37,28 @@ query get_home_devices($id: Float!) {
 }
 """
 
+# Template for reading the parameters of several devices in one request, see
+# LumicAPI.iterDeviceParameters.
+QUERY_DEVICES_PARAMETERS = """
+query get_devices_parameters(%s) {
+%s
+}
+"""
+QUERY_DEVICES_PARAMETERS_VARIABLES = "$id%(i)i: Float!"
+QUERY_DEVICES_PARAMETERS_FIELD = """    device%(i)i: deviceById(id: $id%(i)i) {
+        id
+        uuid
+        deviceParameters {
+            type
+            value
+            valueNumeric
+        }
+    }"""
+
+# Number of devices read per request by bulk reads, which bounds the size of
+# a single response for large homes.
+QUERY_DEVICES_CHUNK_SIZE = 25
+
 QUERY_DEVICE_BY_ID = """
 query get_device_by_id($id: Float!) {
     deviceById(id: $id) {
@@ -56,8 +80,72 @@ query get_device_by_id($id: Float!) {
 }
 """
 
+# Template for setting several parameters in one request, see
+# LumicAPI.setDeviceParameters.
+MUTATION_DEVICE_PARAMETERS_SET = """
+mutation device_parameters_set(%s) {
+%s
+}
+"""
+MUTATION_DEVICE_PARAMETERS_SET_VARIABLES = "$uuid%(i)i: String!, $type%(i)i: ParameterType!, $value%(i)i: String!"
+MUTATION_DEVICE_PARAMETERS_SET_FIELD = "    set%(i)i: deviceParameterSet(uuid: $uuid%(i)i, type: $type%(i)i, value: $value%(i)i)"
+
+# Maximum number of parameter writes sent in one request.
+MUTATION_BATCH_SIZE = 50
+
+# Seconds between writing COLOR and COLOR_WHITE, the device needs to apply the
+# color before it accepts the white channel.
+COLOR_WHITE_DELAY = 0.5
+
+# Poll queries per platform. They only request what the entities decode;
+# static metadata such as the hardware address comes from discovery.
+QUERY_LIGHT_POLL = """
+query poll_light($id: Float!) {
+    deviceById(id: $id) {
+        online
+        deviceParameters {
+            type
+            value
+            valueNumeric
+        }
+    }
+}
+"""
+
+QUERY_SWITCH_POLL = """
+query poll_switch($id: Float!) {
+    deviceById(id: $id) {
+        deviceParameters {
+            type
+            valueNumeric
+        }
+    }
+}
+"""
+
+QUERY_COVER_POLL = """
+query poll_cover($id: Float!) {
+    deviceById(id: $id) {
+        online
+        deviceParameters {
+            type
+            valueNumeric
+        }
+    }
+}
+"""
+
 MUTATION_DEVICE_PARAMETER_SET = """
 mutation device_parameter_set($uuid: String!, $type: ParameterType!, $value: String!) {
     deviceParameterSet(uuid: $uuid, type: $type, value: $value)
 }
 """
+
+SERVICE_SNAPSHOT = "snapshot"
+SERVICE_RESTORE = "restore"
+
+ATTR_SNAPSHOT = "snapshot"
+
+# Device parameters captured by the snapshot service, in the order they are
+# restored.
+SNAPSHOT_PARAMETERS = ["BRIGHTNESS", "COLOR", "COLOR_WHITE", "MODE", "STATE"]
@@ -0,0 +1,168 @@
+"""Per-home coordination for the Lumic integration."""
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+
+from homeassistant.core import callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .const import DOMAIN
+
+
+_LOGGER = logging.getLogger(__name__)
+
+# Interval at which the device list of a home is compared with the entities.
+DISCOVERY_INTERVAL = timedelta(minutes=10)
+
+# Number of consecutive discoveries a device must be missing from before its
+# entity is removed. Until then it is only unavailable, so a partial response
+# of the cloud does not wipe the entities and their customizations.
+REMOVAL_DISCOVERIES = 3
+
+
+def device_name(device):
+    """Return the entity name of a discovered device."""
+    return device["room"]["name"] + " " + device["name"]
+
+
+async def async_track_devices(
+    hass,
+    config_entry,
+    coordinator,
+    device_type,
+    async_add_devices,
+    create_entity,
+    label,
+    manufacturer,
+    model,
+):
+    """Add entities for the devices of a type and keep them in sync.
+
+    Whenever the coordinator rediscovers the home, new devices get an entity
+    and renamed devices are renamed in place. Devices that disappeared are
+    unavailable at first and only removed from the registries once they were
+    missing from ``REMOVAL_DISCOVERIES`` discoveries in a row. Unchanged
+    entities are left alone.
+    """
+    device_registry = await hass.helpers.device_registry.async_get_registry()
+    entity_registry = await hass.helpers.entity_registry.async_get_registry()
+    entities = {}
+    # Device ID -> number of consecutive discoveries the device was missing from
+    missing = {}
+    # Entities of all platforms of the entry by device ID, used by the services.
+    entry_entities = hass.data[DOMAIN][config_entry.entry_id]["entities"]
+
+    @callback
+    def async_sync():
+        if not coordinator.last_update_success:
+            return
+        devices = {i["id"]: i for i in coordinator.devices(device_type)}
+
+        for _id, i in devices.items():
+            name = device_name(i)
+            entity = entities.get(_id)
+            if entity is not None:
+                if missing.pop(_id, None) is not None:
+                    _LOGGER.info("Lumic %s %s is back.", label, entity.name)
+                    entity.async_set_missing(False)
+                if entity.name != name:
+                    entity.async_rename(name)
+                    device = device_registry.async_get_device({(DOMAIN, _id)})
+                    if device is not None:
+                        device_registry.async_update_device(device.id, name=name)
+                continue
+
+            try:
+                entity = create_entity(i)
+                async_add_devices([entity], update_before_add=not entity.restored)
+                device_registry.async_get_or_create(
+                    config_entry_id=config_entry.entry_id,
+                    connections={(dr.CONNECTION_NETWORK_MAC, i["hardwareAddress"])},
+                    identifiers={(DOMAIN, i["id"])},
+                    manufacturer=manufacturer,
+                    name=name,
+                    model=model,
+                    sw_version=0.2,
+                )
+                entities[_id] = entity
+                entry_entities[str(_id)] = entity
+            except Exception as e:
+                _LOGGER.error("Can't add Lumic %s with ID %s.", label, i["uuid"])
+                _LOGGER.error(e)
+
+        for _id in [i for i in entities if i not in devices]:
+            missing[_id] = missing.get(_id, 0) + 1
+            if missing[_id] < REMOVAL_DISCOVERIES:
+                if missing[_id] == 1:
+                    _LOGGER.warning(
+                        "Lumic %s %s is missing from its home.", label, entities[_id].name
+                    )
+                    entities[_id].async_set_missing(True)
+                continue
+
+            del missing[_id]
+            entity = entities.pop(_id)
+            entry_entities.pop(str(_id), None)
+            _LOGGER.info("Removing Lumic %s %s, it left the home.", label, entity.name)
+            if entity.entity_id is not None:
+                entity_registry.async_remove(entity.entity_id)
+            device = device_registry.async_get_device({(DOMAIN, _id)})
+            if device is not None:
+                device_registry.async_remove_device(device.id)
+            if coordinator.catalogue is not None:
+                coordinator.catalogue.remove_device(_id)
+
+    async_sync()
+    config_entry.async_on_unload(coordinator.async_add_listener(async_sync))
+
+
+class LumicHomeCoordinator(DataUpdateCoordinator):
+    """Discover the devices of one Lumic home, every ``DISCOVERY_INTERVAL``.
+
+    All coordinators of a config entry share the same API instance, and with it
+    the same token and GraphQL session.
+    """
+
+    def __init__(self, hass, api, home_id, catalogue=None):
+        """Initialize the coordinator for a home."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="%s home %s" % (DOMAIN, home_id),
+            update_interval=DISCOVERY_INTERVAL,
+        )
+        self.api = api
+        self.home_id = home_id
+        self.catalogue = catalogue
+
+    def async_restore(self):
+        """Use the stored device list of the home, if there is one.
+
+        Returns true if the coordinator was restored and only needs to be
+        reconciled with the cloud in the background.
+        """
+        if self.catalogue is None:
+            return False
+        devices = self.catalogue.home_devices(self.home_id)
+        if devices is None:
+            return False
+        self.async_set_updated_data(devices)
+        return True
+
+    async def _async_update_data(self):
+        """Fetch the device list of the home."""
+        try:
+            devices = await self.api.getHomeDevices(home_id=self.home_id)
+        except Exception as e:
+            raise UpdateFailed(
+                "Can't fetch devices of Lumic home %s: %s" % (self.home_id, e)
+            ) from e
+        if self.catalogue is not None:
+            self.catalogue.set_home_devices(self.home_id, devices)
+        return devices
+
+    def devices(self, _type):
+        """Return the discovered devices of the given type."""
+        return [i for i in self.data or [] if i["deviceType"] == _type]
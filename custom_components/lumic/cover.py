@@ -0,0 +1,260 @@
+"""Support for roller shutters through the Lumic API."""
+from __future__ import annotations
+
+import logging
+
+from homeassistant.components.cover import (
+    ATTR_POSITION,
+    DEVICE_CLASS_SHUTTER,
+    SUPPORT_CLOSE,
+    SUPPORT_OPEN,
+    SUPPORT_SET_POSITION,
+    SUPPORT_STOP,
+    CoverEntity,
+)
+from homeassistant.helpers.event import async_track_time_interval
+from datetime import timedelta
+
+from .const import ATTR_DEVICE_TYPE_COVER, DOMAIN, QUERY_COVER_POLL
+from .entity import LumicEntity
+
+
+_LOGGER = logging.getLogger(__name__)
+
+# Polling interval while the shutter is idle.
+SCAN_INTERVAL = timedelta(seconds=60)
+
+# Polling interval while the shutter is moving.
+BURST_INTERVAL = timedelta(seconds=1)
+
+# Upper bound for the polls of a burst. It is only reset by a new command or
+# when the shutter was seen to stop, so a shutter whose position keeps
+# changing cannot keep the burst going.
+BURST_MAX_POLLS = 120
+
+# Number of polls without a position change after a command before the
+# shutter is considered stopped, to give the motor time to start.
+STALL_POLLS = 3
+
+DIRECTION_UP = "UP"
+DIRECTION_DOWN = "DOWN"
+DIRECTION_STOP = "STOP"
+
+
+async def async_setup_entry(hass, config_entry, async_add_devices):
+    from .coordinator import async_track_devices, device_name
+
+    try:
+        data = hass.data[DOMAIN][config_entry.entry_id]
+        api = data["api"]
+        catalogue = data["catalogue"]
+
+        def create_entity(i):
+            return LumicCover(api, i["id"], i["uuid"], device_name(i), catalogue=catalogue, mac=i["hardwareAddress"])
+
+        for coordinator in data["coordinators"]:
+            await async_track_devices(
+                hass,
+                config_entry,
+                coordinator,
+                ATTR_DEVICE_TYPE_COVER,
+                async_add_devices,
+                create_entity,
+                "Cover",
+                "Cedgetec",
+                "Roller Shutter V1.0",
+            )
+    except Exception as e:
+        _LOGGER.error("Can't add Lumic Covers:")
+        _LOGGER.error(e)
+        return False
+
+    return True
+
+
+class LumicCover(LumicEntity, CoverEntity):
+    """Define a Lumic roller shutter.
+
+    The shutter is polled every ``SCAN_INTERVAL`` while idle. As soon as it is
+    moving, either because a command was sent or because a poll saw its
+    position change, it is polled every ``BURST_INTERVAL`` until the position
+    reaches the target or stops changing. The ``DIRECTION`` parameter is only
+    written: the cloud may keep the last commanded value, so it does not tell
+    whether the shutter is still moving.
+    """
+
+    def __init__(self, api, device_id, device_uuid, name, catalogue=None, mac=None):
+        """Initialize a Lumic roller shutter."""
+        super().__init__(api, device_id, device_uuid, name, catalogue=catalogue, mac=mac)
+        self._position = None
+        self._target = None
+        self._unchanged_polls = 0
+        self._direction = DIRECTION_STOP
+        self._polling = False
+        self._available = False
+        self._burst_unsub = None
+        self._burst_polls = 0
+        self._restore()
+
+    async def _async_command(self, _type, value, direction, target):
+        try:
+            await self._lock.acquire()
+            if await self._api.setDeviceParameter(self._device_uuid, _type, value):
+                self._version += 1
+                self._direction = direction
+                self._target = target
+                self._unchanged_polls = 0
+                self.async_write_ha_state()
+                self._burst_polls = 0
+                self._start_burst()
+        finally:
+            self._lock.release()
+
+    async def async_open_cover(self, **kwargs) -> None:
+        """Open the shutter."""
+        self._logger.info("Open")
+        await self._async_command("DIRECTION", DIRECTION_UP, DIRECTION_UP, 100)
+
+    async def async_close_cover(self, **kwargs) -> None:
+        """Close the shutter."""
+        self._logger.info("Close")
+        await self._async_command("DIRECTION", DIRECTION_DOWN, DIRECTION_DOWN, 0)
+
+    async def async_stop_cover(self, **kwargs) -> None:
+        """Stop the shutter."""
+        self._logger.info("Stop")
+        await self._async_command("DIRECTION", DIRECTION_STOP, DIRECTION_STOP, None)
+
+    async def async_set_cover_position(self, **kwargs) -> None:
+        """Move the shutter to a position."""
+        position = int(kwargs[ATTR_POSITION])
+        self._logger.info("Position %i", position)
+        direction = DIRECTION_STOP
+        if self._position is not None and position > self._position:
+            direction = DIRECTION_UP
+        elif self._position is not None and position < self._position:
+            direction = DIRECTION_DOWN
+        await self._async_command("POSITION", str(position), direction, position)
+
+    def _start_burst(self):
+        """Poll quickly until the shutter stops moving."""
+        if self._burst_polls >= BURST_MAX_POLLS:
+            return
+        if self._burst_unsub is None and self.hass is not None:
+            self._burst_unsub = async_track_time_interval(
+                self.hass, self._async_burst_poll, BURST_INTERVAL
+            )
+
+    def _stop_burst(self):
+        if self._burst_unsub is not None:
+            self._burst_unsub()
+            self._burst_unsub = None
+
+    async def _async_burst_poll(self, now=None):
+        if self._polling:
+            # The previous poll is still running, skip this tick.
+            return
+        self._burst_polls += 1
+        await self.async_update()
+        if not self.is_moving:
+            self._stop_burst()
+        elif self._burst_polls >= BURST_MAX_POLLS:
+            self._logger.warning("Shutter did not stop moving, ending burst.")
+            self._stop_burst()
+            self._direction = DIRECTION_STOP
+            self._target = None
+        self.async_write_ha_state()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel a running burst."""
+        self._stop_burst()
+
+    async def async_update(self):
+        """Update entity attributes when the device status has changed."""
+        if self._polling:
+            return
+        self._polling = True
+        try:
+            await self._async_poll()
+        finally:
+            self._polling = False
+
+    async def _async_poll(self):
+        result = await self._async_fetch(QUERY_COVER_POLL)
+        if result is not None:
+            self._applyDevice(result)
+
+    def _applyDevice(self, result):
+        """Decode a device query result into the entity attributes."""
+        self._available = result["online"] == 1
+        self._applyParameters(result["deviceParameters"])
+
+    def _applyParameters(self, parameters):
+        """Decode device parameters into the entity attributes."""
+        previous_position = self._position
+
+        for i in parameters:
+            if i["type"] == "POSITION" and i["valueNumeric"] is not None:
+                self._position = int(i["valueNumeric"])
+
+        if previous_position is None or self._position == previous_position:
+            self._unchanged_polls += 1
+        else:
+            self._unchanged_polls = 0
+            if self._position > previous_position:
+                self._direction = DIRECTION_UP
+            else:
+                self._direction = DIRECTION_DOWN
+
+        # Right after a command the motor may not have started yet; otherwise
+        # a single poll without a change means the shutter stopped.
+        stall_polls = STALL_POLLS if self._target is not None else 1
+        if (
+            self._target is not None and self._position == self._target
+        ) or self._unchanged_polls >= stall_polls:
+            self._direction = DIRECTION_STOP
+            self._target = None
+
+        if self.is_moving:
+            self._start_burst()
+        else:
+            # Seen at rest, so a later movement, e.g. from the wall switch,
+            # gets a full burst again.
+            self._burst_polls = 0
+
+    @property
+    def is_moving(self) -> bool:
+        """Return true if the shutter is moving."""
+        return self._direction in (DIRECTION_UP, DIRECTION_DOWN)
+
+    @property
+    def device_class(self):
+        """Return the class of this device."""
+        return DEVICE_CLASS_SHUTTER
+
+    @property
+    def current_cover_position(self):
+        """Return the current position, 0 is closed and 100 is open."""
+        return self._position
+
+    @property
+    def is_opening(self) -> bool:
+        """Return true if the shutter is opening."""
+        return self._direction == DIRECTION_UP
+
+    @property
+    def is_closing(self) -> bool:
+        """Return true if the shutter is closing."""
+        return self._direction == DIRECTION_DOWN
+
+    @property
+    def is_closed(self):
+        """Return true if the shutter is closed."""
+        if self._position is None:
+            return None
+        return self._position == 0
+
+    @property
+    def supported_features(self) -> int:
+        """Flag supported features."""
+        return SUPPORT_OPEN | SUPPORT_CLOSE | SUPPORT_STOP | SUPPORT_SET_POSITION
@@ -0,0 +1,180 @@
+"""Base entities of the Lumic integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from homeassistant.core import callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.entity import Entity
+
+from .const import DOMAIN
+
+
+class LumicEntity(Entity):
+    """Define a Lumic device entity.
+
+    Subclasses initialize this class first, then their own attributes, and
+    finally call ``_restore`` so the last known state from the catalogue is
+    decoded with ``_applyDevice``.
+    """
+
+    def __init__(self, api, device_id, device_uuid, name, catalogue=None, mac=None):
+        """Initialize a Lumic entity."""
+        self._lock = asyncio.Lock()
+        self._api = api
+        self._catalogue = catalogue
+        self._device_id = device_id
+        self._device_uuid = device_uuid
+        self._name = name
+        self._mac = mac
+        # Incremented on every confirmed write, so polls that were in flight
+        # meanwhile can be recognized as stale and dropped.
+        self._version = 0
+        self._available = True
+        # Set while the device is missing from the discoveries of its home.
+        self._missing = False
+        self._logger = logging.getLogger(
+            ("%s:%s:<%s>") % (self.__class__.__module__, self.__class__.__name__, self._device_uuid)
+        )
+        self.restored = False
+
+    def _restore(self):
+        """Decode the last known state of the device, if the catalogue has one."""
+        if self._catalogue is None:
+            return
+        cached = self._catalogue.device(self._device_id)
+        if cached is not None:
+            self._applyDevice(cached)
+            self.restored = True
+
+    def _applyDevice(self, result):
+        """Decode a device query result into the entity attributes."""
+        self._applyParameters(result["deviceParameters"])
+
+    def _applyParameters(self, parameters):
+        """Decode device parameters into the entity attributes."""
+        raise NotImplementedError
+
+    @callback
+    def async_apply_parameters(self, parameters):
+        """Apply parameters that were written for the entity, e.g. by lumic.restore.
+
+        As with the entity's own writes, polls that are already in flight are
+        dropped and no refresh is needed.
+        """
+        self._version += 1
+        self._applyParameters(parameters)
+        if self.hass is not None:
+            self.async_write_ha_state()
+
+    async def async_added_to_hass(self) -> None:
+        """Reconcile a restored entity with the cloud in the background."""
+        if self.restored:
+            self.async_schedule_update_ha_state(True)
+
+    async def _async_fetch(self, query):
+        """Poll the device with ``query``.
+
+        Returns None if the poll failed or if a write was confirmed while it
+        was in flight, since its result may predate that write.
+        """
+        version = self._version
+        result = await self._api.getDeviceById(self._device_id, query)
+        if result is None:
+            return None
+
+        if version != self._version:
+            self._logger.debug("Dropping poll result older than the last write.")
+            return None
+
+        if self._catalogue is not None:
+            self._catalogue.set_device(self._device_id, result)
+        return result
+
+    @callback
+    def async_set_missing(self, missing):
+        """Mark the device as missing from the discovery of its home, or back."""
+        self._missing = missing
+        if self.hass is not None:
+            self.async_write_ha_state()
+
+    @callback
+    def async_rename(self, name):
+        """Update the name after the device was renamed or changed rooms."""
+        self._name = name
+        if self.hass is not None:
+            self.async_write_ha_state()
+
+    @property
+    def device_info(self):
+        return {
+            "identifiers": {
+                (DOMAIN, self.unique_id)
+            },
+            "connections": {(dr.CONNECTION_NETWORK_MAC, self._mac)},
+            "name": self.name,
+            "manufacturer": "Cedgetec",
+            "model": "Lumic",
+            "sw_version": 0.2,
+        }
+
+    @property
+    def available(self):
+        """Return if able to retrieve information from device or not."""
+        return self._available and not self._missing
+
+    @property
+    def unique_id(self):
+        """Return the unique_id of the device."""
+        return self._device_id
+
+    @property
+    def name(self):
+        """Return the name of the device."""
+        return self._name
+
+
+class LumicQueuedEntity(LumicEntity):
+    """Define a Lumic entity whose writes can go through the command queue."""
+
+    def __init__(self, api, device_id, device_uuid, name, queue=None, catalogue=None, mac=None):
+        """Initialize a Lumic entity."""
+        super().__init__(api, device_id, device_uuid, name, catalogue=catalogue, mac=mac)
+        self._queue = queue
+
+    def _hasPendingWrites(self):
+        """Return true if queued writes of the device were not delivered yet.
+
+        Polls are skipped meanwhile to keep the optimistic state.
+        """
+        return self._queue is not None and self._queue.has_pending(self._device_uuid)
+
+    async def _setParameter(self, _type, value, attribute, delay=0):
+        """Write a device parameter, through the command queue if enabled.
+
+        With the queue the write returns immediately and ``attribute`` is
+        restored to its current value if the write is finally given up.
+        Returns true if the write was confirmed or queued; the caller then
+        updates ``attribute`` itself instead of refreshing the whole device.
+        """
+        if self._queue is None:
+            if delay:
+                await self._api.sleep(delay)
+            if not await self._api.setDeviceParameter(self._device_uuid, _type, value):
+                return False
+            self._version += 1
+            return True
+
+        previous = getattr(self, attribute)
+
+        def rollback():
+            setattr(self, attribute, previous)
+            if self.hass is not None:
+                self.async_write_ha_state()
+
+        self._queue.enqueue(
+            self._device_uuid, _type, value, on_failure=rollback, delay=delay
+        )
+        self._version += 1
+        return True
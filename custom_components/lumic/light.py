@@ -4,8 +4,6 @@ from __future__ import annotations
 from collections.abc import Sequence
 
 import logging
-import colorsys
-import asyncio
 
 from homeassistant.components.light import (
     ATTR_BRIGHTNESS,
@@ -16,18 +14,11 @@ from homeassistant.components.light import (
     SUPPORT_EFFECT,
     LightEntity,
 )
-import homeassistant.util.color as color_util
-from homeassistant.helpers import (
-    aiohttp_client,
-    config_entry_oauth2_flow,
-    config_validation as cv,
-    device_registry as dr,
-)
-from homeassistant.util import Throttle
-from datetime import timedelta
+from homeassistant.helpers import device_registry as dr
 
-from .api import OAuth2Client, LumicAPI
-from .const import ATTR_DEVICE_TYPE_LIGHT, DOMAIN
+from .color import hs_to_lumic, lumic_to_hs
+from .const import ATTR_DEVICE_TYPE_LIGHT, COLOR_WHITE_DELAY, DOMAIN, QUERY_LIGHT_POLL
+from .entity import LumicQueuedEntity
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -35,6 +26,8 @@ _LOGGER = logging.getLogger(__name__)
 async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     """Set up the WiZ Light platform from legacy config."""
 
+    from .api import OAuth2Client, LumicAPI
+
     try:
         auth = OAuth2Client(hass, config)
         api = LumicAPI(auth, hass, config)
@@ -44,7 +37,7 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
         for i in devices:
             try:
                 async_add_entities(
-                    [LumicLight(api, i["id"], i["uuid"], i["room"]["name"] + " " + i["name"])],
+                    [LumicLight(api, i["id"], i["uuid"], i["room"]["name"] + " " + i["name"], mac=i["hardwareAddress"])],
                     update_before_add=True,
                 )
                 device_registry.async_get_or_create(
@@ -68,30 +61,29 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
 
 
 async def async_setup_entry(hass, config_entry, async_add_devices):
+    from .coordinator import async_track_devices, device_name
+
     try:
-        auth = OAuth2Client(hass, config_entry.data)
-        api = LumicAPI(auth, hass, config_entry.data)
-        device_registry = await hass.helpers.device_registry.async_get_registry()
-        
-        devices = await api.getHomeDevices(ATTR_DEVICE_TYPE_LIGHT)
-        for i in devices:
-            try:
-                async_add_devices(
-                    [LumicLight(api, i["id"], i["uuid"], i["room"]["name"] + " " + i["name"])],
-                    update_before_add=True,
-                )
-                device_registry.async_get_or_create(
-                    config_entry_id=config_entry.entry_id,
-                    connections={(dr.CONNECTION_NETWORK_MAC, i["hardwareAddress"])},
-                    identifiers={(DOMAIN, i["id"])},
-                    manufacturer="Lumic",
-                    name=i["room"]["name"] + " " + i["name"],
-                    model="Light V1.0",
-                    sw_version=0.2,
-                )
-            except Exception as e:
-                _LOGGER.error("Can't add Lumic Light with ID %s.", i["uuid"])
-                _LOGGER.error(e)
+        data = hass.data[DOMAIN][config_entry.entry_id]
+        api = data["api"]
+        catalogue = data["catalogue"]
+        queue = data["queue"]
+
+        def create_entity(i):
+            return LumicLight(api, i["id"], i["uuid"], device_name(i), queue, catalogue=catalogue, mac=i["hardwareAddress"])
+
+        for coordinator in data["coordinators"]:
+            await async_track_devices(
+                hass,
+                config_entry,
+                coordinator,
+                ATTR_DEVICE_TYPE_LIGHT,
+                async_add_devices,
+                create_entity,
+                "Light",
+                "Lumic",
+                "Light V1.0",
+            )
     except Exception as e:
         _LOGGER.error("Can't add Lumic Lights:")
         _LOGGER.error(e)
@@ -110,17 +102,12 @@ def get_capabilities(capabilities: Sequence[str]) -> Sequence[str] | None:
     return supported
 
 
-class LumicLight(LightEntity):
+class LumicLight(LumicQueuedEntity, LightEntity):
     """Define a Lumict light."""
 
-    def __init__(self, api, device_id, device_uuid, name):
+    def __init__(self, api, device_id, device_uuid, name, queue=None, catalogue=None, mac=None):
         """Initialize a Lumic light."""
-        self._lock = asyncio.Lock()
-        self._api = api
-        self._device_id = device_id
-        self._device_uuid = device_uuid
-        self._name = name
-        self._mac = None
+        super().__init__(api, device_id, device_uuid, name, queue=queue, catalogue=catalogue, mac=mac)
         self._brightness = 0
         self._hs_color = [0, 0]
         self._state = False
@@ -181,9 +168,7 @@ class LumicLight(LightEntity):
         self._effect = None
         self._available = False
         self._supported_features = self._determine_features()
-        self._logger = logging.getLogger(
-            ("%s:%s:<%s>") % (__name__, self.__class__.__name__, self._device_uuid)
-        )
+        self._restore()
 
     def _determine_features(self):
         """Get features supported by the device."""
@@ -202,34 +187,29 @@ class LumicLight(LightEntity):
             if "brightness" in kwargs:
                 self._logger.info("Found brightness attribute: %i", kwargs["brightness"])
                 brightness = kwargs["brightness"]
-                await self._api.setDeviceParameter(
-                    self._device_uuid, "BRIGHTNESS", str(brightness)
-                )
+                if await self._setParameter("BRIGHTNESS", str(brightness), "_brightness"):
+                    self._brightness = brightness
             if "hs_color" in kwargs:
                 hs_color = kwargs["hs_color"]
-                color_rgb = colorsys.hsv_to_rgb(self.scale(hs_color[0], 360, 1), 1.0, 255)
-                color_rgb_str = '#%02x%02x%02x' % (int(color_rgb[0]), int(color_rgb[1]), int(color_rgb[2]))
-                color_white = int(255 - self.scale(int(hs_color[1]), 100, 255))
-                if (color_white == 255):
-                    color_rgb_str = "#000000"
-
-                await self._api.setDeviceParameter(
-                    self._device_uuid, "COLOR", str(color_rgb_str)
-                )
-                await self._api.sleep(0.5)
-                await self._api.setDeviceParameter(
-                    self._device_uuid, "COLOR_WHITE", str(color_white)
-                )
+                color_rgb_str, color_white = hs_to_lumic(hs_color[0], hs_color[1])
+
+                if await self._setParameter(
+                    "COLOR", str(color_rgb_str), "_hs_color"
+                ) and await self._setParameter(
+                    "COLOR_WHITE", str(color_white), "_hs_color", delay=COLOR_WHITE_DELAY
+                ):
+                    self._hs_color = [hs_color[0], hs_color[1]]
             if ATTR_EFFECT in kwargs:
                 effect = kwargs[ATTR_EFFECT]
                 index = self._scenes.index(effect)
-                await self._api.setDeviceParameter(
-                    self._device_uuid, "MODE", str(self._scenes_mapping[index])
-                )
+                if await self._setParameter(
+                    "MODE", str(self._scenes_mapping[index]), "_effect"
+                ):
+                    self._effect = effect
             if not self._state:
-                await self._api.setDeviceParameter(self._device_uuid, "STATE", "1")
-                self._state = True
-            self.async_schedule_update_ha_state(True)
+                if await self._setParameter("STATE", "1", "_state"):
+                    self._state = True
+            self.async_write_ha_state()
         finally:
             self._lock.release()
 
@@ -238,9 +218,9 @@ class LumicLight(LightEntity):
         try:
             await self._lock.acquire()
             self._logger.info("Off")
-            self._state = False
-            await self._api.setDeviceParameter(self._device_uuid, "STATE", "0")
-            self.async_schedule_update_ha_state(True)
+            if await self._setParameter("STATE", "0", "_state"):
+                self._state = False
+            self.async_write_ha_state()
         finally:
             self._lock.release()
 
@@ -251,15 +231,24 @@ class LumicLight(LightEntity):
             self._device_uuid,
         )
 
-        result = await self._api.getDeviceById(self._device_id)
+        if self._hasPendingWrites():
+            return
 
-        self._mac = result["hardwareAddress"]
+        result = await self._async_fetch(QUERY_LIGHT_POLL)
+        if result is not None:
+            self._applyDevice(result)
+
+    def _applyDevice(self, result):
+        """Decode a device query result into the entity attributes."""
         self._available = result["online"] == 1
+        self._applyParameters(result["deviceParameters"])
 
+    def _applyParameters(self, parameters):
+        """Decode device parameters into the entity attributes."""
         color = None
         color_white = None
 
-        for i in result["deviceParameters"]:
+        for i in parameters:
             # State
             if i["type"] == "STATE" and i["valueNumeric"] == 1:
                 self._state = True
@@ -288,11 +277,7 @@ class LumicLight(LightEntity):
                 self._effect = self._scenes[index]
         
         if (color != None and color_white != None):
-            r, g, b = int("0x%s" % color[1:3], base=16), int("0x%s" % color[3:5], base=16), int("0x%s" % color[5:7], base=16)
-            h, s, v = colorsys.rgb_to_hsv(r, g, b)
-            scaled_hue = int(self.scale(h, 1, 360))
-            scaled_cw = int(self.scale(255-color_white, 255, 100))
-            self._hs_color = [scaled_hue, scaled_cw]
+            self._hs_color = list(lumic_to_hs(color, color_white))
             
     async def async_set_color(self, hs_color):
         """Set the color of the device."""
@@ -300,29 +285,6 @@ class LumicLight(LightEntity):
     async def async_set_level(self, brightness: int, transition: int):
         """Set the brightness of the light over transition."""
 
-    @property
-    def device_info(self):
-        return {
-            "identifiers": {
-                (DOMAIN, self.unique_id)
-            },
-            "connections": {(dr.CONNECTION_NETWORK_MAC, self._mac)},
-            "name": self.name,
-            "manufacturer": "Cedgetec",
-            "model": "Lumic",
-            "sw_version": 0.2,
-        }
-
-    @property
-    def unique_id(self):
-        """Return light unique_id."""
-        return self._device_id
-
-    @property
-    def name(self):
-        """Return the ip as name of the device if any."""
-        return self._name
-
     @property
     def brightness(self):
         """Return the brightness of this light between 0..255."""
@@ -368,9 +330,4 @@ class LumicLight(LightEntity):
         """Return the list of supported effects.
         URL: https://docs.pro.wizconnected.com/#light-modes
         """
-        return self._scenes
-
-    @property
-    def available(self):
-        """Return if able to retrieve information from device or not."""
-        return self._available
\ No newline at end of file
+        return self._scenes
\ No newline at end of file
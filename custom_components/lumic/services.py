@@ -0,0 +1,206 @@
+"""Services of the Lumic integration."""
+from __future__ import annotations
+
+from functools import partial
+import asyncio
+import logging
+
+import voluptuous as vol
+
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import entity_registry as er
+
+from .const import (
+    ATTR_SNAPSHOT,
+    COLOR_WHITE_DELAY,
+    DOMAIN,
+    SERVICE_RESTORE,
+    SERVICE_SNAPSHOT,
+    SNAPSHOT_PARAMETERS,
+)
+
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT = "default"
+
+SERVICE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+        vol.Optional(ATTR_SNAPSHOT, default=DEFAULT_SNAPSHOT): cv.string,
+    }
+)
+
+
+def _parameter_value(parameter):
+    """Return a device parameter as the string the mutation expects."""
+    if parameter["value"] is not None:
+        return str(parameter["value"])
+    if parameter["valueNumeric"] is not None:
+        return str(int(parameter["valueNumeric"]))
+    return None
+
+
+def _parameter(_type, value):
+    """Return a written parameter in the shape of a device query result."""
+    try:
+        value_numeric = float(value)
+    except ValueError:
+        value_numeric = None
+    return {"type": _type, "value": value, "valueNumeric": value_numeric}
+
+
+def _selected_entities(hass, entity_ids):
+    """Return ``{entry_id: {device_id: entity_id}}`` for the selected entities.
+
+    Without a selection all Lumic entities are used.
+    """
+    registry = er.async_get(hass)
+    selected = {}
+    for entry in registry.entities.values():
+        if entry.platform != DOMAIN:
+            continue
+        if entity_ids is not None and entry.entity_id not in entity_ids:
+            continue
+        if entry.config_entry_id not in hass.data.get(DOMAIN, {}):
+            continue
+        selected.setdefault(entry.config_entry_id, {})[str(entry.unique_id)] = entry.entity_id
+    return selected
+
+
+async def _async_read_parameters(data, device_ids):
+    """Read the snapshot parameters of the given devices of a config entry.
+
+    The devices are read in chunks with aliased queries and processed as each
+    chunk arrives.
+    """
+    devices = {}
+    async for device in data["api"].iterDeviceParameters(device_ids):
+        parameters = {}
+        for i in device["deviceParameters"]:
+            if i["type"] in SNAPSHOT_PARAMETERS:
+                value = _parameter_value(i)
+                if value is not None:
+                    parameters[i["type"]] = value
+        devices[str(device["id"])] = {"uuid": device["uuid"], "parameters": parameters}
+    return devices
+
+
+async def _async_restore_devices(data, devices, device_ids):
+    """Write the saved parameters of the given devices that changed since.
+
+    With write-behind the writes go through the command queue, like the
+    entities' own writes: commands still waiting there are taken into account
+    for what changed, and are replaced by the restored values instead of being
+    delivered after them. Otherwise the writes are sent in batches.
+
+    As for ``LumicLight.async_turn_on``, COLOR_WHITE is written
+    ``COLOR_WHITE_DELAY`` after COLOR. The writes of one batch reach the
+    device without a gap, so COLOR_WHITE goes into a second batch.
+    """
+    queue = data["queue"]
+    current = await _async_read_parameters(data, device_ids)
+
+    # device_id -> [(type, value)] of the parameters to write
+    writes = {}
+    for device_id in device_ids:
+        saved = devices[device_id]["parameters"]
+        now = current.get(device_id, {}).get("parameters", {})
+        if queue is not None:
+            now = {**now, **queue.pending_values(devices[device_id]["uuid"])}
+        changed = [
+            (_type, saved[_type])
+            for _type in SNAPSHOT_PARAMETERS
+            if _type in saved and saved[_type] != now.get(_type)
+        ]
+        if changed:
+            writes[device_id] = changed
+
+    if not writes:
+        return
+
+    if queue is not None:
+        for device_id, parameters in writes.items():
+            entity = data["entities"].get(device_id)
+            on_failure = None
+            if entity is not None:
+                on_failure = partial(entity.async_schedule_update_ha_state, True)
+            colored = any(_type == "COLOR" for _type, value in parameters)
+            for _type, value in parameters:
+                delay = COLOR_WHITE_DELAY if _type == "COLOR_WHITE" and colored else 0
+                queue.enqueue(
+                    devices[device_id]["uuid"], _type, value, on_failure=on_failure, delay=delay
+                )
+        success = True
+    else:
+        first = []
+        second = []
+        for device_id, parameters in writes.items():
+            for _type, value in parameters:
+                batch = second if _type == "COLOR_WHITE" else first
+                batch.append((devices[device_id]["uuid"], _type, value))
+
+        success = True
+        if first:
+            success = await data["api"].setDeviceParameters(first)
+        if second:
+            if any(_type == "COLOR" for uuid, _type, value in first):
+                await asyncio.sleep(COLOR_WHITE_DELAY)
+            success = await data["api"].setDeviceParameters(second) and success
+
+    # Update the entities from what was written instead of polling every
+    # device again.
+    for device_id in writes:
+        entity = data["entities"].get(device_id)
+        if entity is None:
+            continue
+        if success:
+            entity.async_apply_parameters(
+                [
+                    _parameter(_type, value)
+                    for _type, value in devices[device_id]["parameters"].items()
+                ]
+            )
+        else:
+            entity.async_schedule_update_ha_state(True)
+
+
+def async_setup_services(hass):
+    """Register the Lumic services."""
+    snapshots = hass.data.setdefault(DOMAIN, {}).setdefault("snapshots", {})
+
+    async def async_snapshot(call):
+        """Capture the state of the selected devices."""
+        snapshot = {}
+        for entry_id, entities in _selected_entities(
+            hass, call.data.get(ATTR_ENTITY_ID)
+        ).items():
+            snapshot[entry_id] = await _async_read_parameters(
+                hass.data[DOMAIN][entry_id], entities
+            )
+        snapshots[call.data[ATTR_SNAPSHOT]] = snapshot
+
+    async def async_restore(call):
+        """Apply a snapshot, writing only parameters that changed since."""
+        snapshot = snapshots.get(call.data[ATTR_SNAPSHOT])
+        if snapshot is None:
+            _LOGGER.error("Unknown Lumic snapshot %s.", call.data[ATTR_SNAPSHOT])
+            return
+
+        selected = _selected_entities(hass, call.data.get(ATTR_ENTITY_ID))
+        for entry_id, devices in snapshot.items():
+            entities = selected.get(entry_id, {})
+            data = hass.data[DOMAIN].get(entry_id)
+            if data is None:
+                continue
+            await _async_restore_devices(
+                data, devices, [i for i in devices if i in entities]
+            )
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_SNAPSHOT, async_snapshot, schema=SERVICE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_RESTORE, async_restore, schema=SERVICE_SCHEMA
+    )
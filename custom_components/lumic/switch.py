@@ -4,24 +4,13 @@ from __future__ import annotations
 from collections.abc import Sequence
 
 import logging
-import colorsys
-import asyncio
 
 from homeassistant.components.switch import (
     SwitchEntity
 )
-import homeassistant.util.color as color_util
-from homeassistant.helpers import device_registry as dr
-from homeassistant.helpers import (
-    aiohttp_client,
-    config_entry_oauth2_flow,
-    config_validation as cv,
-)
-from homeassistant.util import Throttle
-from datetime import timedelta
 
-from .api import OAuth2Client, LumicAPI
-from .const import ATTR_DEVICE_TYPE_SWITCH, DOMAIN
+from .const import ATTR_DEVICE_TYPE_SWITCH, DOMAIN, QUERY_SWITCH_POLL
+from .entity import LumicQueuedEntity
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -30,6 +19,8 @@ _LOGGER = logging.getLogger(__name__)
 async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     """Set up the WiZ Light platform from legacy config."""
 
+    from .api import OAuth2Client, LumicAPI
+
     try:
         auth = OAuth2Client(hass, config)
         api = LumicAPI(auth, hass, config)
@@ -37,7 +28,7 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
         for i in devices:
             try:
                 async_add_entities(
-                    [LumicSwitch(api, i["id"], i["uuid"], i["room"]["name"] + " " + i["name"])],
+                    [LumicSwitch(api, i["id"], i["uuid"], i["room"]["name"] + " " + i["name"], mac=i["hardwareAddress"])],
                     update_before_add=True,
                 )
             except Exception as e:
@@ -52,30 +43,29 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
 
 
 async def async_setup_entry(hass, config_entry, async_add_devices):
+    from .coordinator import async_track_devices, device_name
+
     try:
-        auth = OAuth2Client(hass, config_entry.data)
-        api = LumicAPI(auth, hass, config_entry.data)
-        device_registry = await hass.helpers.device_registry.async_get_registry()
-        
-        devices = await api.getHomeDevices(ATTR_DEVICE_TYPE_SWITCH)
-        for i in devices:
-            try:
-                async_add_devices(
-                    [LumicSwitch(api, i["id"], i["uuid"], i["room"]["name"] + " " + i["name"])],
-                    update_before_add=True,
-                )
-                device_registry.async_get_or_create(
-                    config_entry_id=config_entry.entry_id,
-                    connections={(dr.CONNECTION_NETWORK_MAC, i["hardwareAddress"])},
-                    identifiers={(DOMAIN, i["id"])},
-                    manufacturer="Cedgetec",
-                    name=i["room"]["name"] + " " + i["name"],
-                    model="Switch V1.0",
-                    sw_version=0.2,
-                )
-            except Exception as e:
-                _LOGGER.error("Can't add Lumic Switch with ID %s.", i["uuid"])
-                _LOGGER.error(e)
+        data = hass.data[DOMAIN][config_entry.entry_id]
+        api = data["api"]
+        catalogue = data["catalogue"]
+        queue = data["queue"]
+
+        def create_entity(i):
+            return LumicSwitch(api, i["id"], i["uuid"], device_name(i), queue, catalogue=catalogue, mac=i["hardwareAddress"])
+
+        for coordinator in data["coordinators"]:
+            await async_track_devices(
+                hass,
+                config_entry,
+                coordinator,
+                ATTR_DEVICE_TYPE_SWITCH,
+                async_add_devices,
+                create_entity,
+                "Switch",
+                "Cedgetec",
+                "Switch V1.0",
+            )
     except Exception as e:
         _LOGGER.error("Can't add Lumic Switches:")
         _LOGGER.error(e)
@@ -92,24 +82,17 @@ def get_capabilities(capabilities: Sequence[str]) -> Sequence[str] | None:
     return supported
 
 
-class LumicSwitch(SwitchEntity):
+class LumicSwitch(LumicQueuedEntity, SwitchEntity):
     """Define a Lumict light."""
 
-    def __init__(self, api, device_id, device_uuid, name):
+    def __init__(self, api, device_id, device_uuid, name, queue=None, catalogue=None, mac=None):
         """Initialize a Lumic light."""
-        self._lock = asyncio.Lock()
-        self._api = api
-        self._device_id = device_id
-        self._device_uuid = device_uuid
-        self._name = name
-        self._mac = None
+        super().__init__(api, device_id, device_uuid, name, queue=queue, catalogue=catalogue, mac=mac)
         self._brightness = 0
         self._hs_color = [0, 0]
         self._state = False
         self._supported_features = self._determine_features()
-        self._logger = logging.getLogger(
-            ("%s:%s:<%s>") % (__name__, self.__class__.__name__, self._device_uuid)
-        )
+        self._restore()
 
     def _determine_features(self):
         """Get features supported by the device."""
@@ -124,9 +107,9 @@ class LumicSwitch(SwitchEntity):
             await self._lock.acquire()
             self._logger.info("On")
             if not self._state:
-                await self._api.setDeviceParameter(self._device_uuid, "STATE", "1")
-                self._state = True
-            self.async_schedule_update_ha_state(True)
+                if await self._setParameter("STATE", "1", "_state"):
+                    self._state = True
+            self.async_write_ha_state()
         finally:
             self._lock.release()
 
@@ -135,9 +118,9 @@ class LumicSwitch(SwitchEntity):
         try:
             await self._lock.acquire()
             self._logger.info("Off")
-            self._state = False
-            await self._api.setDeviceParameter(self._device_uuid, "STATE", "0")
-            self.async_schedule_update_ha_state(True)
+            if await self._setParameter("STATE", "0", "_state"):
+                self._state = False
+            self.async_write_ha_state()
         finally:
             self._lock.release()
 
@@ -148,14 +131,16 @@ class LumicSwitch(SwitchEntity):
             self._device_uuid,
         )
 
-        result = await self._api.getDeviceById(self._device_id)
+        if self._hasPendingWrites():
+            return
 
-        self._mac = result["hardwareAddress"]
+        result = await self._async_fetch(QUERY_SWITCH_POLL)
+        if result is not None:
+            self._applyDevice(result)
 
-        color = None
-        color_white = None
-
-        for i in result["deviceParameters"]:
+    def _applyParameters(self, parameters):
+        """Decode device parameters into the entity attributes."""
+        for i in parameters:
             # State
             if i["type"] == "STATE" and i["valueNumeric"] == 1:
                 self._state = True
@@ -168,29 +153,6 @@ class LumicSwitch(SwitchEntity):
     async def async_set_level(self, brightness: int, transition: int):
         """Set the brightness of the light over transition."""
 
-    @property
-    def device_info(self):
-        return {
-            "identifiers": {
-                (DOMAIN, self.unique_id)
-            },
-            "connections": {(dr.CONNECTION_NETWORK_MAC, self._mac)},
-            "name": self.name,
-            "manufacturer": "Cedgetec",
-            "model": "Lumic",
-            "sw_version": 0.2,
-        }
-
-    @property
-    def unique_id(self):
-        """Return light unique_id."""
-        return self._device_id
-
-    @property
-    def name(self):
-        """Return the ip as name of the device if any."""
-        return self._name
-
     @property
     def brightness(self):
         """Return the brightness of this light between 0..255."""
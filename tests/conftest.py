@@ -0,0 +1,5 @@
+"""Make the integration importable as ``custom_components.lumic``."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,95 @@
+"""Tests for the Lumic color conversion."""
+import colorsys
+import importlib.util
+import random
+import time
+from pathlib import Path
+
+# color.py only needs the standard library, load it without Home Assistant.
+_spec = importlib.util.spec_from_file_location(
+    "lumic_color",
+    Path(__file__).resolve().parents[1] / "custom_components" / "lumic" / "color.py",
+)
+color = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(color)
+
+
+def _reference_hs_to_lumic(hue, saturation):
+    """The uncached conversion LumicLight used before color.py existed."""
+    r, g, b = colorsys.hsv_to_rgb(hue / 360, 1.0, 255)
+    color_white = int(255 - int(saturation) * 255 / 100)
+    if color_white == 255:
+        return "#000000", color_white
+    return "#%02x%02x%02x" % (int(r), int(g), int(b)), color_white
+
+
+def _channels(value):
+    return [int(value[i:i + 2], 16) for i in (1, 3, 5)]
+
+
+def _hue_distance(a, b):
+    return min(abs(a - b), 360 - abs(a - b))
+
+
+def test_whole_hues_match_reference():
+    for hue in range(360):
+        for saturation in range(0, 101):
+            assert color.hs_to_lumic(hue, saturation) == _reference_hs_to_lumic(
+                hue, saturation
+            )
+
+
+def test_fractional_hues_within_one_step_of_reference():
+    rng = random.Random(0)
+    for _ in range(20000):
+        hue, saturation = rng.uniform(0, 360), rng.uniform(0, 100)
+        value, color_white = color.hs_to_lumic(hue, saturation)
+        expected, expected_white = _reference_hs_to_lumic(hue, saturation)
+        assert color_white == expected_white
+        for a, b in zip(_channels(value), _channels(expected)):
+            assert abs(a - b) <= 1
+
+
+def test_round_trip():
+    for hue in range(360):
+        for saturation in range(1, 100):
+            value, color_white = color.hs_to_lumic(hue, saturation)
+            result_hue, result_saturation = color.lumic_to_hs(value, color_white)
+            assert _hue_distance(result_hue, hue) <= 1
+            assert result_saturation == saturation
+
+
+def test_lumic_to_hs_accepts_upper_case():
+    assert color.lumic_to_hs("#FF8000", 0) == color.lumic_to_hs("#ff8000", 0)
+
+
+def test_batch_matches_single():
+    colors = [(i * 7.3 % 360, i % 101) for i in range(500)]
+    assert color.hs_to_lumic_many(colors) == [color.hs_to_lumic(*i) for i in colors]
+    values = color.hs_to_lumic_many(colors)
+    assert color.lumic_to_hs_many(values) == [color.lumic_to_hs(*i) for i in values]
+
+
+def _best_of(runs, func, *args):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def test_benchmark_transition_frames():
+    # A transition repeats few distinct colors across many lights and frames.
+    frames = [(i % 60 * 0.5, 80) for i in range(50000)]
+    color.hs_to_lumic_many(frames)
+
+    cached = _best_of(3, color.hs_to_lumic_many, frames)
+    reference = _best_of(
+        3, lambda: [_reference_hs_to_lumic(hue, saturation) for hue, saturation in frames]
+    )
+    assert cached < reference, "hs_to_lumic_many: %.0f frames/s, reference: %.0f frames/s" % (
+        len(frames) / cached,
+        len(frames) / reference,
+    )
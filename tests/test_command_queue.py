@@ -0,0 +1,86 @@
+"""Tests for the Lumic write-behind command queue."""
+import asyncio
+
+import pytest
+
+# Home Assistant loads its core before any integration module.
+pytest.importorskip("homeassistant.core")
+
+from custom_components.lumic.command_queue import LumicCommandQueue  # noqa: E402
+
+
+class FakeStore:
+    """In-memory replacement for the Home Assistant store."""
+
+    def __init__(self):
+        self.data = None
+
+    async def async_load(self):
+        return self.data
+
+    def async_delay_save(self, data_func, delay=0):
+        self.data = data_func()
+
+    async def async_save(self, data):
+        self.data = data
+
+
+class FakeHass:
+    def async_create_task(self, target):
+        return asyncio.get_running_loop().create_task(target)
+
+
+class FakeAPI:
+    """Accept every write except those to the devices in ``failing``."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+        self.written = []
+
+    async def setDeviceParameter(self, uuid, _type, value):
+        self.calls.append(uuid)
+        if uuid in self.failing:
+            return False
+        self.written.append((uuid, _type, value))
+        return True
+
+
+def _queue(api):
+    queue = LumicCommandQueue(FakeHass(), api, "entry")
+    queue._store = FakeStore()
+    return queue
+
+
+def test_failing_device_does_not_delay_others():
+    async def run():
+        api = FakeAPI(failing={"broken"})
+        queue = _queue(api)
+        queue.async_start()
+        queue.enqueue("broken", "STATE", "1")
+        await asyncio.sleep(0.05)
+        assert api.calls == ["broken"]
+
+        # The broken device is now backing off; a healthy one goes out at once.
+        queue.enqueue("healthy", "STATE", "1")
+        await asyncio.sleep(0.1)
+        assert api.written == [("healthy", "STATE", "1")]
+        assert queue.has_pending("broken")
+        assert api.calls.count("broken") == 1
+
+        # The broken device is retried once its own backoff expired.
+        await asyncio.sleep(1)
+        assert api.calls.count("broken") == 2
+        await queue.async_stop()
+
+    asyncio.run(run())
+
+
+def test_replaced_write_keeps_first_rollback():
+    queue = _queue(FakeAPI())
+    first, second = object(), object()
+    queue.enqueue("device", "STATE", "1", on_failure=first)
+    queue.enqueue("device", "STATE", "0", on_failure=second)
+    command = queue._pending["device"]["STATE"]
+    assert command["value"] == "0"
+    assert command["on_failure"] is first
@@ -0,0 +1,82 @@
+"""Import-time budget of the Lumic integration."""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Seconds the integration and its platforms may take to import, on top of the
+# Home Assistant modules that are already loaded when it is set up.
+IMPORT_BUDGET = 0.2
+
+# Modules Home Assistant has imported before it loads the integration.
+PRELOADED = [
+    "homeassistant.core",
+    "homeassistant.const",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.entity",
+    "homeassistant.components.light",
+    "homeassistant.components.switch",
+    "homeassistant.components.cover",
+]
+
+# Dependencies that must only be imported once they are used.
+LAZY = [
+    "gql",
+    "requests",
+    "requests_oauthlib",
+    "oauthlib",
+    "urllib3",
+    "homeassistant.helpers.update_coordinator",
+]
+
+MODULES = [
+    "custom_components.lumic",
+    "custom_components.lumic.light",
+    "custom_components.lumic.switch",
+    "custom_components.lumic.cover",
+]
+
+SCRIPT = """
+import importlib, json, sys, time
+for name in {preloaded!r}:
+    importlib.import_module(name)
+preloaded = set(sys.modules)
+start = time.perf_counter()
+for name in {modules!r}:
+    importlib.import_module(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "elapsed": elapsed,
+    "imported": sorted(set(sys.modules) - preloaded),
+}}))
+"""
+
+
+def _measure():
+    """Import the integration in a fresh interpreter, the import cache is per process."""
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT.format(preloaded=PRELOADED, modules=MODULES)],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def test_import_time_within_budget():
+    # Take the best of a few runs to keep the test stable on busy machines.
+    elapsed = min(_measure()["elapsed"] for _ in range(3))
+    assert elapsed < IMPORT_BUDGET, "Importing Lumic took %.3fs" % elapsed
+
+
+def test_heavy_dependencies_are_not_imported():
+    imported = _measure()["imported"]
+    for name in LAZY:
+        assert name not in imported, "%s is imported at load time" % name
@@ -0,0 +1,142 @@
+"""Tests for the Lumic snapshot and restore services."""
+import asyncio
+
+import pytest
+
+# Home Assistant loads its core before any integration module.
+pytest.importorskip("homeassistant.core")
+
+from custom_components.lumic.command_queue import LumicCommandQueue  # noqa: E402
+from custom_components.lumic.const import COLOR_WHITE_DELAY  # noqa: E402
+from custom_components.lumic.light import LumicLight  # noqa: E402
+from custom_components.lumic.services import (  # noqa: E402
+    _async_read_parameters,
+    _async_restore_devices,
+)
+
+DEVICE_ID = "1"
+UUID = "light-uuid"
+
+
+class FakeStore:
+    async def async_load(self):
+        return None
+
+    def async_delay_save(self, data_func, delay=0):
+        pass
+
+    async def async_save(self, data):
+        pass
+
+
+class FakeHass:
+    def async_create_task(self, target):
+        return asyncio.get_running_loop().create_task(target)
+
+
+class FakeAPI:
+    """Keep the parameters of one light the way the cloud would."""
+
+    def __init__(self, parameters):
+        self.parameters = dict(parameters)
+        self.writes = []
+        self.batches = []
+
+    async def iterDeviceParameters(self, ids):
+        for _id in ids:
+            yield {
+                "id": int(_id),
+                "uuid": UUID,
+                "deviceParameters": [
+                    {"type": _type, "value": value, "valueNumeric": None}
+                    for _type, value in self.parameters.items()
+                ],
+            }
+
+    async def setDeviceParameter(self, uuid, _type, value):
+        self.writes.append((_type, value))
+        self.parameters[_type] = value
+        return True
+
+    async def setDeviceParameters(self, parameters):
+        self.batches.append((asyncio.get_running_loop().time(), [i[1] for i in parameters]))
+        for uuid, _type, value in parameters:
+            await self.setDeviceParameter(uuid, _type, value)
+        return True
+
+    async def sleep(self, _time):
+        await asyncio.sleep(_time)
+
+
+def _setup(queued):
+    api = FakeAPI({"STATE": "0", "BRIGHTNESS": "50", "COLOR": "#ff0000", "COLOR_WHITE": "0"})
+    queue = None
+    if queued:
+        queue = LumicCommandQueue(FakeHass(), api, "entry")
+        queue._store = FakeStore()
+    light = LumicLight(api, int(DEVICE_ID), UUID, "Light", queue=queue)
+    # The light is not added to Home Assistant.
+    light.async_write_ha_state = lambda: None
+    data = {"api": api, "queue": queue, "entities": {DEVICE_ID: light}}
+    return api, queue, light, data
+
+
+def test_restore_right_after_queued_turn_on():
+    async def run():
+        api, queue, light, data = _setup(queued=True)
+        snapshot = await _async_read_parameters(data, [DEVICE_ID])
+
+        # An alert flash whose writes are still waiting in the queue.
+        await light.async_turn_on(brightness=255)
+        assert api.parameters["STATE"] == "0"
+
+        await _async_restore_devices(data, snapshot, [DEVICE_ID])
+        assert not light.is_on
+        assert light.brightness == 50
+
+        queue.async_start()
+        for _ in range(100):
+            if not queue.has_pending(UUID):
+                break
+            await asyncio.sleep(0.01)
+        await queue.async_stop()
+
+        # The flash was superseded instead of being delivered after the restore.
+        assert api.parameters["STATE"] == "0"
+        assert api.parameters["BRIGHTNESS"] == "50"
+        assert ("STATE", "1") not in api.writes
+
+    asyncio.run(run())
+
+
+def test_restore_writes_only_changed_parameters():
+    async def run():
+        api, queue, light, data = _setup(queued=False)
+        snapshot = await _async_read_parameters(data, [DEVICE_ID])
+
+        await light.async_turn_on(brightness=255)
+        api.writes.clear()
+
+        await _async_restore_devices(data, snapshot, [DEVICE_ID])
+        assert sorted(api.writes) == [("BRIGHTNESS", "50"), ("STATE", "0")]
+        assert not light.is_on
+        assert light.brightness == 50
+
+    asyncio.run(run())
+
+
+def test_restore_writes_color_white_after_color():
+    async def run():
+        api, queue, light, data = _setup(queued=False)
+        snapshot = await _async_read_parameters(data, [DEVICE_ID])
+
+        await light.async_turn_on(hs_color=(120, 50))
+        api.batches.clear()
+
+        await _async_restore_devices(data, snapshot, [DEVICE_ID])
+        (first_time, first), (second_time, second) = api.batches
+        assert "COLOR" in first and "COLOR_WHITE" not in first
+        assert second == ["COLOR_WHITE"]
+        assert second_time - first_time >= COLOR_WHITE_DELAY
+
+    asyncio.run(run())